@@ -12,21 +12,23 @@ a research pattern with three specialized agents:
 This mirrors human cognitive processes: planning → note-taking → synthesis
 """
 
-from crewai import Agent, Crew, Process, Task, LLM
-from crewai.project import CrewBase, agent, crew, task
+from crewai import Agent, Crew, Process, Task
+from crewai.project import CrewBase, after_kickoff, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from crewai_tools import TavilySearchTool
-from typing import List
-import os
-from pathlib import Path
+from typing import List, Optional
+
+from context_offloading.llm import get_llm
 
 # Import custom scratchpad tools
 from context_offloading.tools.custom_tool import (
     ScratchpadWriteTool,
     ScratchpadReadTool,
-    UserPreferenceTool
+    UserPreferenceTool,
+    compact_scratchpad
 )
 
+
 @CrewBase
 class ContextOffloading():
     """
@@ -39,16 +41,14 @@ class ContextOffloading():
     agents: List[BaseAgent]
     tasks: List[Task]
     
-    def __init__(self):
+    def __init__(self, subtopics: Optional[List[str]] = None):
         super().__init__()
         
-        # Initialize Gemini LLM (same as context pruning implementation)
-        self.llm = LLM(
-            model="gemini/gemini-2.0-flash",
-            api_key=os.getenv("GEMINI_API_KEY"),
-            max_retries=3,
-            retry_delay=60  # Wait 60 seconds between retries to handle rate limits
-        )
+        # Independent subtopics are researched in parallel (see crew())
+        self.subtopics = list(subtopics or [])
+        
+        # Gemini LLM shared by every agent and every crew built in this process
+        self.llm = get_llm()
         
         # Initialize scratchpad tools (shared across all agents)
         self.scratchpad_write = ScratchpadWriteTool()
@@ -57,15 +57,6 @@ class ContextOffloading():
         
         # Initialize web search tool
         self.tavily_search = TavilySearchTool()
-        
-        # Clear scratchpad at start of new crew run
-        self._clear_scratchpad()
-    
-    def _clear_scratchpad(self):
-        """Clear scratchpad.json at start of new run for clean slate."""
-        scratchpad_file = Path(__file__).parent.parent.parent / "knowledge" / "scratchpad.json"
-        if scratchpad_file.exists():
-            scratchpad_file.unlink()
     
     @agent
     def research_planner(self) -> Agent:
@@ -96,6 +87,10 @@ class ContextOffloading():
         - Update scratchpad with findings iteratively
         - Create final summary
         """
+        return self._new_researcher()
+    
+    def _new_researcher(self) -> Agent:
+        """Build an unshared researcher Agent (the @agent method memoizes one instance)."""
         return Agent(
             config=self.agents_config['researcher'], # type: ignore[index]
             tools=[self.scratchpad_read, self.scratchpad_write, self.tavily_search],
@@ -142,6 +137,40 @@ class ContextOffloading():
             output_file='report.md'
         )
 
+    def subtopic_research_tasks(self) -> List[Task]:
+        """
+        One research task per subtopic, run concurrently.
+        
+        Each task depends only on the research plan, so they are marked
+        async and execute in parallel instead of one after another. Every
+        task gets its own researcher Agent: an Agent keeps its executor on
+        itself while running, so concurrent tasks must not share one.
+        """
+        config = self.tasks_config['subtopic_research_task'] # type: ignore[index]
+        planning_task = self.planning_task()
+        return [
+            Task(
+                description=config['description'].replace('{subtopic}', subtopic),
+                expected_output=config['expected_output'].replace('{subtopic}', subtopic),
+                agent=self._new_researcher(),
+                context=[planning_task],
+                async_execution=True,
+            )
+            for subtopic in self.subtopics
+        ]
+    
+    def findings_summary_task(self) -> Task:
+        """Summarize the parallel subtopic findings (waits for all of them)."""
+        return Task(
+            config=self.tasks_config['findings_summary_task'], # type: ignore[index]
+        )
+
+    @after_kickoff
+    def compact_scratchpad_after_run(self, result):
+        """Group the append-only scratchpad by category once the run is done."""
+        compact_scratchpad()
+        return result
+
     @crew
     def crew(self) -> Crew:
         """
@@ -152,12 +181,28 @@ class ContextOffloading():
         2. Research Agent → Reads plan → Searches → Updates scratchpad → Repeats
         3. Synthesis Agent → Reads all scratchpad → Creates final report
         
+        When subtopics are given, step 2 becomes one async research task per
+        subtopic (depending only on the plan) followed by a summary task, so
+        the independent searches run in parallel.
+        
         This demonstrates context offloading across all three stages.
         """
+        agents = list(self.agents) # Automatically created by the @agent decorator
+        if self.subtopics:
+            subtopic_tasks = self.subtopic_research_tasks()
+            agents.extend(t.agent for t in subtopic_tasks)
+            tasks = [
+                self.planning_task(),
+                *subtopic_tasks,
+                self.findings_summary_task(),
+                self.synthesis_task(),
+            ]
+        else:
+            tasks = self.tasks # Automatically created by the @task decorator
+        
         return Crew(
-            agents=self.agents, # Automatically created by the @agent decorator
-            tasks=self.tasks, # Automatically created by the @task decorator
+            agents=agents,
+            tasks=tasks,
             process=Process.sequential,
             verbose=True,
-            outpu
         )
@@ -0,0 +1,52 @@
+"""
+Shared Gemini LLM for the context offloading crew.
+
+The client is created lazily, once per process, and reused by every agent so
+they share one connection pool and retry state.
+"""
+
+from crewai import LLM
+from functools import lru_cache
+from litellm.exceptions import RateLimitError
+import os
+import random
+import time
+
+
+# Rate-limit retry policy: exponential backoff (1s, 2s, 4s, ...) plus jitter, capped
+RATE_LIMIT_ATTEMPTS = 5
+RATE_LIMIT_MAX_DELAY = 30  # seconds
+
+
+class BackoffLLM(LLM):
+    """
+    LLM that retries rate-limited calls with capped exponential backoff and jitter.
+    
+    Most 429s clear within a few seconds, so short randomized waits recover far
+    faster than a fixed long delay and keep concurrent agents from retrying in lockstep.
+    """
+    
+    def call(self, *args, **kwargs):
+        for attempt in range(RATE_LIMIT_ATTEMPTS):
+            try:
+                return super().call(*args, **kwargs)
+            except RateLimitError:
+                if attempt == RATE_LIMIT_ATTEMPTS - 1:
+                    raise
+                delay = min(RATE_LIMIT_MAX_DELAY, 2 ** attempt) + random.uniform(0, 1)
+                time.sleep(delay)
+
+
+@lru_cache
+def get_llm(model: str = "gemini/gemini-2.0-flash") -> LLM:
+    """
+    Create the Gemini LLM once per process (same as context pruning implementation).
+
+    Repeated crew builds (tests, replays) reuse the same client instead of
+    re-initializing it for every ContextOffloading instance.
+    """
+    return BackoffLLM(
+        model=model,
+        api_key=os.getenv("GEMINI_API_KEY"),
+        max_retries=3  # transport-level retries; rate limits are handled by BackoffLLM
+    )
@@ -15,11 +15,24 @@ mirroring the example from the LangGraph notebook.
 import sys
 import warnings
 from datetime import datetime
+from functools import lru_cache
 
 from context_offloading.crew import ContextOffloading
+from context_offloading.tools.custom_tool import clear_scratchpad
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
+
+# Independent parts of the default topic, researched in parallel
+SUBTOPICS = ('NVIDIA', 'AMD', 'Intel', 'Groq', 'Cerebras')
+
+
+@lru_cache(maxsize=1)
+def _get_crew(subtopics=()):
+    """Build the crew once per process; LLM clients and tools are reused across kickoffs."""
+    return ContextOffloading(subtopics=list(subtopics)).crew()
+
+
 # This main file is intended to be a way for you to run your
 # crew locally, so refrain from adding unnecessary logic into this file.
 # Replace with inputs you want to test with, it will automatically
@@ -47,7 +60,8 @@ def run():
     print("\n" + "=" * 80 + "\n")
     
     try:
-        ContextOffloading().crew().kickoff(inputs=inputs)
+        clear_scratchpad()
+        _get_crew(SUBTOPICS).kickoff(inputs=inputs)
     except Exception as e:
         raise Exception(f"An error occurred while running the crew: {e}")
 
@@ -61,7 +75,8 @@ def train():
         'current_year': str(datetime.now().year)
     }
     try:
-        ContextOffloading().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
+        clear_scratchpad()
+        _get_crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
 
     except Exception as e:
         raise Exception(f"An error occurred while training the crew: {e}")
@@ -71,7 +86,7 @@ def replay():
     Replay the crew execution from a specific task.
     """
     try:
-        ContextOffloading().crew().replay(task_id=sys.argv[1])
+        _get_crew().replay(task_id=sys.argv[1])
 
     except Exception as e:
         raise Exception(f"An error occurred while replaying the crew: {e}")
@@ -86,7 +101,8 @@ def test():
     }
     
     try:
-        ContextOffloading().crew().test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=inputs)
+        clear_scratchpad()
+        _get_crew().test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=inputs)
 
     except Exception as e:
         raise Exception(f"An error occurred while testing the crew: {e}")
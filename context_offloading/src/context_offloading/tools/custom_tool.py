@@ -8,18 +8,311 @@ This module implements scratchpad tools for context offloading:
 """
 
 from crewai.tools import BaseTool
+from collections import defaultdict
+from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Type, Optional
 from pydantic import BaseModel, Field
-import json
+import atexit
+import mmap
+import orjson
 import os
+import threading
+import time
 from pathlib import Path
 
-# Module-level constants for file paths
-KNOWLEDGE_DIR = Path(__file__).parent.parent.parent.parent / "knowledge"
+# Module-level constants for file paths (resolved once per process and
+# imported by the crew rather than re-derived)
+KNOWLEDGE_DIR = Path(__file__).resolve().parents[3] / "knowledge"
 KNOWLEDGE_DIR.mkdir(exist_ok=True)
-SCRATCHPAD_FILE = KNOWLEDGE_DIR / "scratchpad.json"
+SCRATCHPAD_FILE = KNOWLEDGE_DIR / "scratchpad.jsonl"
+# Sidecar index: category -> byte offsets of that category's lines in SCRATCHPAD_FILE
+SCRATCHPAD_INDEX_FILE = KNOWLEDGE_DIR / "scratchpad.idx.json"
+# Dict-of-lists JSON format used before the switch to JSON Lines
+LEGACY_SCRATCHPAD_FILE = KNOWLEDGE_DIR / "scratchpad.json"
 PREFERENCE_FILE = KNOWLEDGE_DIR / "user_preference.txt"
 
+# Terse ASCII tool results (no emoji banners or markdown) to save output tokens
+LEAN_TOOL_OUTPUT = os.environ.get("LEAN_TOOL_OUTPUT") == "1"
+
+# Research tasks may run concurrently, so scratchpad file access is serialized
+_SCRATCHPAD_LOCK = threading.Lock()
+
+# Writes are buffered in memory and appended to disk at most every few seconds
+FLUSH_INTERVAL = 5.0  # seconds
+FLUSH_BUFFER_SIZE = 1 << 16
+_pending: list = []  # (category, serialized line) not yet on disk
+_last_flush = 0.0
+
+# Per-category entry counts (file + pending), valid while the file size matches the recorded one
+_category_counts: dict = {}
+_counts_file_size: Optional[int] = None
+_legacy_checked = False
+
+# Category offset index, valid while the file's (size, mtime_ns) matches the recorded signature.
+# Flushes only extend it in memory; the sidecar is written at compaction and exit.
+_category_offsets: dict = {}
+_index_signature: Optional[tuple] = None
+_index_dirty = False
+
+
+def _scratchpad_size() -> int:
+    try:
+        return SCRATCHPAD_FILE.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def _scratchpad_signature() -> Optional[tuple]:
+    try:
+        stat = SCRATCHPAD_FILE.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def _save_index_locked() -> None:
+    global _index_dirty
+    SCRATCHPAD_INDEX_FILE.write_bytes(
+        orjson.dumps({"signature": _index_signature, "offsets": _category_offsets})
+    )
+    _index_dirty = False
+
+
+def _invalidate_index_locked() -> None:
+    """Drop the offset index after the scratchpad is rewritten or removed."""
+    global _index_signature, _index_dirty
+    _category_offsets.clear()
+    _index_signature = None
+    _index_dirty = False
+    SCRATCHPAD_INDEX_FILE.unlink(missing_ok=True)
+
+
+def _load_index_locked() -> dict:
+    """
+    Return the category offset index for the current scratchpad file.
+    
+    Served from memory, then from the sidecar file, and rebuilt with one full
+    scan only if both are stale. Must be called with _SCRATCHPAD_LOCK held.
+    """
+    global _category_offsets, _index_signature
+    signature = _scratchpad_signature()
+    if signature is None:
+        _category_offsets, _index_signature = {}, None
+        return _category_offsets
+    if signature == _index_signature:
+        return _category_offsets
+    try:
+        saved = orjson.loads(SCRATCHPAD_INDEX_FILE.read_bytes())
+        if tuple(saved["signature"]) == signature:
+            _category_offsets, _index_signature = saved["offsets"], signature
+            return _category_offsets
+    except (FileNotFoundError, orjson.JSONDecodeError, KeyError, TypeError):
+        pass
+    
+    offsets = defaultdict(list)
+    position = 0
+    with open(SCRATCHPAD_FILE, 'rb') as f:
+        for line in f:
+            if line.strip():
+                offsets[orjson.loads(line)["category"]].append(position)
+            position += len(line)
+    _category_offsets, _index_signature = dict(offsets), signature
+    _save_index_locked()
+    return _category_offsets
+
+
+def _read_entries(category: Optional[str] = None):
+    """
+    Stream scratchpad entries (one JSON object per line) in write order.
+    
+    The file is memory-mapped so lines are read without first copying the
+    whole file. With a category, only that category's lines are visited,
+    by seeking to the offsets in the sidecar index instead of scanning.
+    Must be consumed with _SCRATCHPAD_LOCK held.
+    """
+    try:
+        f = open(SCRATCHPAD_FILE, 'rb')
+    except FileNotFoundError:
+        return
+    with f:
+        # fstat on the open handle: mmap cannot map an empty file
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    with mm:
+        if category is None:
+            for line in iter(mm.readline, b''):
+                if line.strip():
+                    yield orjson.loads(line)
+        else:
+            for offset in _load_index_locked().get(category, ()):
+                mm.seek(offset)
+                yield orjson.loads(mm.readline())
+
+
+def _flush_locked() -> None:
+    """Append buffered entries to disk. Must be called with _SCRATCHPAD_LOCK held."""
+    global _last_flush, _counts_file_size, _index_signature, _index_dirty
+    if _pending:
+        # Bring the index up to date with the file before extending it
+        offsets = _load_index_locked()
+        size_before = _scratchpad_size()
+        with open(SCRATCHPAD_FILE, 'ab', buffering=FLUSH_BUFFER_SIZE) as f:
+            f.writelines(line for _, line in _pending)
+        position = size_before
+        for cat, line in _pending:
+            offsets.setdefault(cat, []).append(position)
+            position += len(line)
+        _pending.clear()
+        _index_signature = _scratchpad_signature()
+        _index_dirty = True
+        # Our own append keeps the counts valid; an outside change still invalidates them
+        if _counts_file_size == size_before:
+            _counts_file_size = _scratchpad_size()
+    _last_flush = time.monotonic()
+
+
+def flush_scratchpad() -> None:
+    """Write any buffered scratchpad entries to disk and persist the offset index."""
+    with _SCRATCHPAD_LOCK:
+        _flush_locked()
+        if _index_dirty:
+            _save_index_locked()
+
+
+atexit.register(flush_scratchpad)
+
+
+def clear_scratchpad() -> None:
+    """
+    Clear the scratchpad (and any legacy scratchpad.json) for a clean slate.
+    
+    Called explicitly at the start of each run (not from the crew constructor)
+    so a single crew instance can be reused across kickoffs.
+    """
+    global _counts_file_size
+    with _SCRATCHPAD_LOCK:
+        _pending.clear()
+        _counts_file_size = None
+        SCRATCHPAD_FILE.unlink(missing_ok=True)
+        LEGACY_SCRATCHPAD_FILE.unlink(missing_ok=True)
+        _invalidate_index_locked()
+
+
+def _group_by_category(entries, category: Optional[str] = None) -> dict:
+    """
+    Group entries by category, keeping categories in first-seen order.
+    
+    With a category, entries from other categories are dropped as they stream by.
+    """
+    scratchpad = defaultdict(list)
+    for entry in entries:
+        if category is None or entry["category"] == category:
+            scratchpad[entry["category"]].append(entry)
+    return scratchpad
+
+
+def _format_timestamp(timestamp) -> str:
+    """Render an epoch timestamp as UTC ISO 8601; legacy entries already store a string."""
+    if isinstance(timestamp, str):
+        return timestamp
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+@lru_cache(maxsize=8)
+def _load_scratchpad(category: Optional[str], mtime_ns: int, size: int) -> dict:
+    """
+    Parse and group the scratchpad, memoized on the file's stat signature.
+    
+    mtime_ns and size are part of the cache key only: any write changes them,
+    so repeated reads of an unchanged file skip parsing entirely. Callers must
+    treat the returned dict as read-only.
+    """
+    return _group_by_category(_read_entries(category), category)
+
+
+@lru_cache(maxsize=8)
+def _load_preferences(mtime_ns: int, size: int) -> str:
+    """Read the preferences file, memoized on its stat signature (see _load_scratchpad)."""
+    with open(PREFERENCE_FILE, 'r') as f:
+        return f.read()
+
+
+def _migrate_legacy_scratchpad() -> None:
+    """
+    One-time conversion of a dict-form scratchpad.json into JSON Lines.
+    
+    Legacy entries are older than anything already in the JSONL file, so they
+    are written first. Must be called with _SCRATCHPAD_LOCK held.
+    """
+    global _legacy_checked
+    if _legacy_checked:
+        return
+    _legacy_checked = True
+    try:
+        legacy = orjson.loads(LEGACY_SCRATCHPAD_FILE.read_bytes())
+    except FileNotFoundError:
+        return
+    
+    try:
+        existing = SCRATCHPAD_FILE.read_bytes()
+    except FileNotFoundError:
+        existing = b""
+    tmp_file = SCRATCHPAD_FILE.with_suffix(".tmp")
+    with open(tmp_file, 'wb') as f:
+        for cat, entries in legacy.items():
+            for entry in entries:
+                f.write(orjson.dumps({"category": cat, **entry}, option=orjson.OPT_APPEND_NEWLINE))
+        f.write(existing)
+    os.replace(tmp_file, SCRATCHPAD_FILE)
+    LEGACY_SCRATCHPAD_FILE.unlink()
+    _invalidate_index_locked()
+
+
+def compact_scratchpad() -> None:
+    """
+    Rewrite the scratchpad with entries grouped by category.
+    
+    Appends interleave categories; compacting once at the end of a crew run
+    leaves a stable, grouped layout so the same prefix is fed to the LLM on
+    every later read (friendlier to provider-side prompt caching).
+    """
+    global _counts_file_size, _category_offsets, _index_signature
+    with _SCRATCHPAD_LOCK:
+        _migrate_legacy_scratchpad()
+        _flush_locked()
+        scratchpad = _group_by_category(_read_entries())
+        if not scratchpad:
+            return
+        tmp_file = SCRATCHPAD_FILE.with_suffix(".tmp")
+        offsets = {}
+        position = 0
+        with open(tmp_file, 'wb') as f:
+            for cat, entries in scratchpad.items():
+                cat_offsets = offsets[cat] = []
+                for entry in entries:
+                    line = orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE)
+                    f.write(line)
+                    cat_offsets.append(position)
+                    position += len(line)
+        os.replace(tmp_file, SCRATCHPAD_FILE)
+        _counts_file_size = None
+        # The grouped layout is known while writing, so persist its index instead of rescanning
+        _category_offsets, _index_signature = offsets, _scratchpad_signature()
+        _save_index_locked()
+
+
+def _format_scratchpad_lean(scratchpad: dict, category: Optional[str]) -> str:
+    """LEAN_TOOL_OUTPUT rendering: one `[category] count` header per group, notes without timestamps."""
+    if category and category not in scratchpad:
+        return f"none {category}"
+    parts = []
+    for cat, entries in scratchpad.items():
+        parts.append(f"[{cat}] {len(entries)}\n")
+        parts.extend(f"{i}. {entry['notes']}\n" for i, entry in enumerate(entries, 1))
+    return "".join(parts)
+
 
 class ScratchpadWriteInput(BaseModel):
     """Input schema for ScratchpadWriteTool."""
@@ -52,7 +345,7 @@ class ScratchpadWriteTool(BaseTool):
     Tool for writing notes to a persistent scratchpad.
     
     This implements context offloading by storing information outside the LLM's
-    context window in a JSON file that persists across agent runs.
+    context window in an append-only JSON Lines file that persists across agent runs.
     
     Benefits:
     - Avoids context rot (information degradation deep in context)
@@ -81,33 +374,43 @@ class ScratchpadWriteTool(BaseTool):
         Returns:
             Confirmation message
         """
+        global _category_counts, _counts_file_size
         try:
-            # Load existing scratchpad
-            if SCRATCHPAD_FILE.exists():
-                with open(SCRATCHPAD_FILE, 'r') as f:
-                    scratchpad = json.load(f)
-            else:
-                scratchpad = {}
-            
-            # Update category
-            if category not in scratchpad:
-                scratchpad[category] = []
-            
-            # Append new notes with timestamp
-            from datetime import datetime
             entry = {
-                "timestamp": datetime.now().isoformat(),
+                "category": category,
+                "timestamp": time.time(),
                 "notes": notes
             }
-            scratchpad[category].append(entry)
+            line = orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE)
             
-            # Save back to file
-            with open(SCRATCHPAD_FILE, 'w') as f:
-                json.dump(scratchpad, f, indent=2)
+            with _SCRATCHPAD_LOCK:
+                _migrate_legacy_scratchpad()
+                
+                # Recount only if the file changed behind our back (cleared, compacted)
+                file_size = _scratchpad_size()
+                if _counts_file_size != file_size:
+                    _category_counts = {}
+                    categories = [existing["category"] for existing in _read_entries()]
+                    categories += [cat for cat, _ in _pending]
+                    for cat in categories:
+                        _category_counts[cat] = _category_counts.get(cat, 0) + 1
+                    _counts_file_size = file_size
+                
+                # Append-only and buffered: the entry reaches disk on the next flush
+                _pending.append((category, line))
+                _category_counts[category] = _category_counts.get(category, 0) + 1
+                total = _category_counts[category]
+                
+                if time.monotonic() - _last_flush >= FLUSH_INTERVAL:
+                    _flush_locked()
             
-            return f"✅ Successfully wrote to scratchpad under category '{category}'. Total entries in this category: {len(scratchpad[category])}"
+            if LEAN_TOOL_OUTPUT:
+                return f"ok {category} {total}"
+            return f"✅ Successfully wrote to scratchpad under category '{category}'. Total entries in this category: {total}"
             
         except Exception as e:
+            if LEAN_TOOL_OUTPUT:
+                return f"error write: {e}"
             return f"❌ Error writing to scratchpad: {str(e)}"
 class ScratchpadReadTool(BaseTool):
     """
@@ -137,36 +440,50 @@ class ScratchpadReadTool(BaseTool):
             Scratchpad contents or error message
         """
         try:
-            if not SCRATCHPAD_FILE.exists():
-                return "📝 Scratchpad is empty. No notes have been saved yet."
+            with _SCRATCHPAD_LOCK:
+                _migrate_legacy_scratchpad()
+                # Reads must see every note written so far
+                _flush_locked()
+                try:
+                    stat = SCRATCHPAD_FILE.stat()
+                except FileNotFoundError:
+                    stat = None
+                if stat is None or stat.st_size == 0:
+                    if LEAN_TOOL_OUTPUT:
+                        return "empty"
+                    return "📝 Scratchpad is empty. No notes have been saved yet."
+                scratchpad = _load_scratchpad(category, stat.st_mtime_ns, stat.st_size)
             
-            with open(SCRATCHPAD_FILE, 'r') as f:
-                scratchpad = json.load(f)
+            if LEAN_TOOL_OUTPUT:
+                return _format_scratchpad_lean(scratchpad, category)
             
-            if not scratchpad:
-                return "📝 Scratchpad is empty. No notes have been saved yet."
-            
-            # Format output
-            output = "📚 **Scratchpad Contents**\n\n"
+            # Format output (collect fragments and join once)
+            parts = ["📚 **Scratchpad Contents**\n\n"]
             
             if category:
                 # Read specific category
                 if category in scratchpad:
-                    output += f"**Category: {category}**\n"
-                    for i, entry in enumerate(scratchpad[category], 1):
-                        output += f"\n{i}. [{entry['timestamp']}]\n{entry['notes']}\n"
+                    parts.append(f"**Category: {category}**\n")
+                    parts.extend(
+                        f"\n{i}. [{_format_timestamp(entry['timestamp'])}]\n{entry['notes']}\n"
+                        for i, entry in enumerate(scratchpad[category], 1)
+                    )
                 else:
-                    output += f"No notes found in category '{category}'."
+                    parts.append(f"No notes found in category '{category}'.")
             else:
                 # Read all categories
                 for cat, entries in scratchpad.items():
-                    output += f"\n**Category: {cat}** ({len(entries)} entries)\n"
-                    for i, entry in enumerate(entries, 1):
-                        output += f"\n{i}. [{entry['timestamp']}]\n{entry['notes']}\n"
+                    parts.append(f"\n**Category: {cat}** ({len(entries)} entries)\n")
+                    parts.extend(
+                        f"\n{i}. [{_format_timestamp(entry['timestamp'])}]\n{entry['notes']}\n"
+                        for i, entry in enumerate(entries, 1)
+                    )
             
-            return output
+            return "".join(parts)
             
         except Exception as e:
+            if LEAN_TOOL_OUTPUT:
+                return f"error read: {e}"
             return f"❌ Error reading scratchpad: {str(e)}"
 
 
@@ -197,16 +514,24 @@ class UserPreferenceTool(BaseTool):
             User preferences or error message
         """
         try:
-            if not PREFERENCE_FILE.exists():
+            # One stat both checks existence and keys the cache; preferences
+            # are read-mostly, so unchanged files are served from memory
+            try:
+                stat = PREFERENCE_FILE.stat()
+            except FileNotFoundError:
+                if LEAN_TOOL_OUTPUT:
+                    return "error preferences: missing"
                 return "⚠️ No user preferences file found. Creating default..."
-            
-            with open(PREFERENCE_FILE, 'r') as f:
-                preferences = f.read()
+            preferences = _load_preferences(stat.st_mtime_ns, stat.st_size)
             
             if not preferences.strip():
-                return "📝 User preferences file is empty."
+                return "empty" if LEAN_TOOL_OUTPUT else "📝 User preferences file is empty."
             
+            if LEAN_TOOL_OUTPUT:
+                return preferences
             return f"👤 **User Preferences**\n\n{preferences}"
             
         except Exception as e:
+            if LEAN_TOOL_OUTPUT:
+                return f"error preferences: {e}"
             return f"❌ Error reading user preferences: {str(e)}"
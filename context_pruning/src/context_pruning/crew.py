@@ -1,17 +1,13 @@
-from crewai import Agent, Crew, Process, Task, LLM
+from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from typing import List
-import os
+
+from context_pruning.llm import get_llm
 
 # Import custom tools
 from context_pruning.tools.custom_tool import RAGRetrievalTool, ContextPruningTool
 
-# Initialize the LLM explicitly
-llm = LLM(
-    model="gemini/gemini-flash-latest",
-    api_key=os.getenv("GEMINI_API_KEY")
-)
 
 # If you want to run a snippet of code before or after the crew starts,
 # you can use the @before_kickoff and @after_kickoff decorators
@@ -35,7 +31,7 @@ class ContextPruning():
         return Agent(
             config=self.agents_config['retrieval_agent'], # type: ignore[index]
             tools=[RAGRetrievalTool()],
-            llm=llm,
+            llm=get_llm(),
             verbose=True
         )
 
@@ -44,7 +40,7 @@ class ContextPruning():
         return Agent(
             config=self.agents_config['pruning_agent'], # type: ignore[index]
             tools=[ContextPruningTool()],
-            llm=llm,
+            llm=get_llm(),
             verbose=True
         )
 
@@ -52,7 +48,7 @@ class ContextPruning():
     def response_synthesizer(self) -> Agent:
         return Agent(
             config=self.agents_config['response_synthesizer'], # type: ignore[index]
-            llm=llm,
+            llm=get_llm(),
             verbose=True
         )
 
@@ -0,0 +1,40 @@
+"""
+Shared Gemini clients for the context pruning crew and its tools.
+
+Every client is created lazily, once per process, and reused by all agents
+and tools so they share one connection pool and retry state.
+"""
+
+from crewai import LLM
+from functools import lru_cache
+import os
+
+
+@lru_cache
+def get_llm(model: str = "gemini/gemini-flash-latest") -> LLM:
+    """CrewAI LLM used by the agents."""
+    return LLM(
+        model=model,
+        api_key=os.getenv("GEMINI_API_KEY")
+    )
+
+
+@lru_cache
+def get_chat_model(model: str = "gemini-flash-latest"):
+    """LangChain chat model used by the pruning tool (temperature 0 for deterministic pruning)."""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model=model,
+        temperature=0,
+        google_api_key=os.getenv("GEMINI_API_KEY")
+    )
+
+
+@lru_cache
+def get_embeddings(model: str = "models/embedding-001"):
+    """LangChain embeddings used to index and query the blog corpus."""
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    return GoogleGenerativeAIEmbeddings(
+        model=model,
+        google_api_key=os.getenv("GEMINI_API_KEY")
+    )
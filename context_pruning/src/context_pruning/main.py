@@ -3,11 +3,24 @@ import sys
 import warnings
 
 from datetime import datetime
+from functools import lru_cache
 
 from context_pruning.crew import ContextPruning
+from context_pruning.tools.custom_tool import preload_vectorstore
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
+
+@lru_cache(maxsize=1)
+def _get_crew():
+    """Build the crew once per process; agents and tools are reused across kickoffs."""
+    # Build the RAG vector store in the background while CrewAI sets up agents.
+    # Done here rather than in the crew constructor so merely instantiating the
+    # crew (e.g. test_setup.py) never spends embedding quota.
+    preload_vectorstore()
+    return ContextPruning().crew()
+
+
 # This main file is intended to be a way for you to run your
 # crew locally, so refrain from adding unnecessary logic into this file.
 # Replace with inputs you want to test with, it will automatically
@@ -23,7 +36,7 @@ def run():
     }
     
     try:
-        result = ContextPruning().crew().kickoff(inputs=inputs)
+        result = _get_crew().kickoff(inputs=inputs)
         print("\n" + "="*80)
         print("CONTEXT PRUNING DEMO - FINAL RESULT")
         print("="*80)
@@ -42,7 +55,7 @@ def train():
         'query': 'What are the types of reward hacking discussed in the blogs?'
     }
     try:
-        ContextPruning().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
+        _get_crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
 
     except Exception as e:
         raise Exception(f"An error occurred while training the crew: {e}")
@@ -52,7 +65,7 @@ def replay():
     Replay the crew execution from a specific task.
     """
     try:
-        ContextPruning().crew().replay(task_id=sys.argv[1])
+        _get_crew().replay(task_id=sys.argv[1])
 
     except Exception as e:
         raise Exception(f"An error occurred while replaying the crew: {e}")
@@ -67,7 +80,7 @@ def test():
     }
     
     try:
-        ContextPruning().crew().test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=inputs)
+        _get_crew().test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=inputs)
 
     except Exception as e:
         raise Exception(f"An error occurred while testing the crew: {e}")
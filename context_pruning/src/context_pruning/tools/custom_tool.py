@@ -1,62 +1,348 @@
 from crewai.tools import BaseTool
-from typing import Type, List
+from typing import Callable, Optional, Type, List
 from pydantic import BaseModel, Field
+from context_pruning.llm import get_chat_model, get_embeddings
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import hashlib
+import json
 import os
+import pickle
+import re
+import threading
+import time
 
 # Lazy imports for performance
 _vectorstore = None
-_pruning_llm = None
+_vectorstore_lock = threading.Lock()
+_bm25 = None
+_prune_cache = None
 
-def _get_vectorstore():
-    """Lazy initialization of vector store to avoid loading on import."""
-    global _vectorstore
-    if _vectorstore is None:
-        from langchain_community.document_loaders import WebBaseLoader
-        from langchain_text_splitters import RecursiveCharacterTextSplitter
-        from langchain_core.vectorstores import InMemoryVectorStore
-        from langchain_google_genai import GoogleGenerativeAIEmbeddings
-        
-        # Load Lilian Weng's blog posts
-        urls = [
-            "https://lilianweng.github.io/posts/2025-05-01-thinking/",
-            "https://lilianweng.github.io/posts/2024-11-28-reward-hacking/",
-            "https://lilianweng.github.io/posts/2024-07-07-hallucination/",
-            "https://lilianweng.github.io/posts/2024-04-12-diffusion-video/",
+# Lilian Weng's blog posts used as the retrieval corpus
+BLOG_URLS = [
+    "https://lilianweng.github.io/posts/2025-05-01-thinking/",
+    "https://lilianweng.github.io/posts/2024-11-28-reward-hacking/",
+    "https://lilianweng.github.io/posts/2024-07-07-hallucination/",
+    "https://lilianweng.github.io/posts/2024-04-12-diffusion-video/",
+]
+# Sizes are in characters (~4 characters per token, so ~3000-token chunks)
+CHUNK_SIZE = 12000
+CHUNK_OVERLAP = 200
+EMBEDDING_MODEL = "models/embedding-001"
+PRUNING_MODEL = "gemini-flash-latest"
+FETCH_TIMEOUT = 10  # seconds per blog post request
+EMBED_BATCH_SIZE = 100  # Gemini's per-request limit for batch embedding
+EMBED_MAX_WORKERS = 4
+EMBED_REQUESTS_PER_MINUTE = 60  # Gemini free tier
+PREFILTER_K = 50  # BM25 candidates passed on to dense scoring
+
+# Bump when the layout of the pickled cache payload or the chunking changes
+_VS_CACHE_VERSION = 3
+VS_CACHE_DIR = Path(os.getenv("CONTEXT_PRUNING_VS_CACHE_DIR", ".cache"))
+
+# Pruning results are memoized on disk; set CONTEXT_PRUNING_DISABLE_PRUNE_CACHE=1 to turn off
+PRUNE_CACHE_DIR = Path(".cache") / "prune"
+# Bump when the pruning behaviour changes in a way the key below does not capture
+_PRUNE_CACHE_VERSION = 1
+PRUNE_CACHE_TTL = 7 * 24 * 60 * 60  # seconds
+PRUNE_CACHE_ENABLED = os.getenv("CONTEXT_PRUNING_DISABLE_PRUNE_CACHE") != "1"
+
+
+def _vs_cache_path() -> Path:
+    """Cache file keyed by everything that affects the stored chunks and vectors."""
+    key = json.dumps(
+        [_VS_CACHE_VERSION, BLOG_URLS, CHUNK_SIZE, CHUNK_OVERLAP, EMBEDDING_MODEL]
+    )
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return VS_CACHE_DIR / f"vs_{digest}.pkl"
+
+
+def _load_cached_corpus(path: Path):
+    """Return (texts, metadatas, vectors) from the disk cache, or None on a miss."""
+    try:
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+        return payload["texts"], payload["metadatas"], payload["vectors"]
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Corrupt or incompatible cache file - rebuild from scratch
+        return None
+
+
+def _save_cached_corpus(path: Path, texts, metadatas, vectors) -> None:
+    """Persist chunk texts, metadata and embeddings for the next process."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                {"texts": texts, "metadatas": metadatas, "vectors": vectors},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_path, path)
+    except OSError:
+        # Caching is an optimization only; a read-only disk must not break retrieval
+        pass
+
+
+def _build_corpus(embeddings):
+    """Download, split and embed the blog posts."""
+    from langchain_community.document_loaders import WebBaseLoader
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    # Fetch all posts concurrently: wall-clock is the slowest request, not the sum
+    def load(url):
+        return WebBaseLoader(url, requests_kwargs={"timeout": FETCH_TIMEOUT}).load()
+
+    with ThreadPoolExecutor(max_workers=len(BLOG_URLS)) as executor:
+        docs = list(executor.map(load, BLOG_URLS))
+    docs_list = [item for sublist in docs for item in sublist]
+
+    # Split documents into chunks
+    # Plain character lengths: no tiktoken pass over the whole corpus
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        length_function=len
+    )
+    doc_splits = text_splitter.split_documents(docs_list)
+
+    import numpy as np
+
+    texts = [doc.page_content for doc in doc_splits]
+    metadatas = [doc.metadata for doc in doc_splits]
+    # A float32 matrix pickles as one contiguous buffer (same bytes as a .npy)
+    vectors = np.asarray(_embed_texts(embeddings, texts), dtype=np.float32)
+    return texts, metadatas, vectors
+
+
+class _RateLimiter:
+    """Spaces out request starts so concurrent batches stay under a per-minute quota."""
+
+    def __init__(self, requests_per_minute: int):
+        self._interval = 60.0 / requests_per_minute
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _embed_texts(embeddings, texts: List[str]) -> List[List[float]]:
+    """Embed texts in request-sized batches, several batches in flight at once."""
+    batches = [
+        texts[i:i + EMBED_BATCH_SIZE]
+        for i in range(0, len(texts), EMBED_BATCH_SIZE)
+    ]
+    limiter = _RateLimiter(EMBED_REQUESTS_PER_MINUTE)
+
+    def embed_batch(batch):
+        limiter.wait()
+        return embeddings.embed_documents(batch)
+
+    with ThreadPoolExecutor(max_workers=EMBED_MAX_WORKERS) as executor:
+        results = executor.map(embed_batch, batches)
+        # executor.map preserves batch order, so vectors line up with texts
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+
+def _quantize_rows(matrix):
+    """Per-row symmetric int8 quantization: returns (codes, scales) with row ≈ codes * scale."""
+    import numpy as np
+
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.round(matrix / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class NumpyVectorStore:
+    """
+    Minimal vector store: one contiguous int8 matrix plus a parallel list of documents.
+
+    Rows are L2-normalized once at insert and then quantized to int8 with a
+    per-row symmetric scale, a quarter of the float32 footprint. Scoring every
+    chunk against a query is a single integer matrix-vector product whose
+    ranking matches cosine similarity up to quantization error.
+    """
+
+    def __init__(self, embedding, texts: List[str], metadatas: List[dict], vectors):
+        import numpy as np
+        from langchain_core.documents import Document
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        # New array: the caller's vectors (e.g. the cached corpus) stay untouched
+        matrix = matrix / norms
+        self.embedding = embedding
+        self.codes, self.scales = _quantize_rows(matrix)
+        self.docs = [
+            Document(page_content=text, metadata=metadata)
+            for text, metadata in zip(texts, metadatas)
         ]
-        
-        docs = [WebBaseLoader(url).load() for url in urls]
-        docs_list = [item for sublist in docs for item in sublist]
-        
-        # Split documents into chunks
-        text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-            chunk_size=3000, 
-            chunk_overlap=50
-        )
-        doc_splits = text_splitter.split_documents(docs_list)
-        
-        # Create vector store with Google Gemini embeddings
-        embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/embedding-001",
-            google_api_key=os.getenv("GEMINI_API_KEY")
-        )
-        _vectorstore = InMemoryVectorStore.from_documents(
-            documents=doc_splits, 
-            embedding=embeddings
-        )
-    
+
+    def similarity_search_by_vector(self, embedding, k: int = 4, candidates=None):
+        """
+        Return the k documents most similar to a query embedding.
+
+        Args:
+            embedding: Query embedding
+            k: Number of documents to return
+            candidates: Optional array of row indices to restrict the search to
+        """
+        import numpy as np
+
+        query = np.asarray(embedding, dtype=np.float32)
+        query_codes, _ = _quantize_rows(query[None, :])
+        # int32 accumulation; the query's own scale is constant so it can't change ranking
+        query_codes = query_codes[0].astype(np.int32)
+        if candidates is None:
+            rows = np.arange(len(self.docs))
+            scores = (self.codes @ query_codes) * self.scales
+        else:
+            rows = np.asarray(candidates)
+            scores = (self.codes[rows] @ query_codes) * self.scales[rows]
+
+        k = min(k, len(rows))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self.docs[i] for i in rows[top]]
+
+    def similarity_search(self, query: str, k: int = 4):
+        return self.similarity_search_by_vector(self.embedding.embed_query(query), k=k)
+
+
+def _tokenize(text: str) -> List[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+def _get_vectorstore():
+    """
+    Lazy initialization of vector store to avoid loading on import.
+
+    Chunks and their embeddings are cached on disk (see CONTEXT_PRUNING_VS_CACHE_DIR)
+    so later processes skip the blog downloads and embedding API calls.
+    A BM25 index over the same chunks is built alongside for lexical prefiltering,
+    but only when the corpus is larger than PREFILTER_K (otherwise it is never used).
+    """
+    global _vectorstore, _bm25
+    if _vectorstore is not None:
+        return _vectorstore
+
+    # Concurrent callers (e.g. the background preload) wait for a single build
+    with _vectorstore_lock:
+        if _vectorstore is not None:
+            return _vectorstore
+
+        # Google Gemini embeddings (also used to embed queries at search time)
+        embeddings = get_embeddings(EMBEDDING_MODEL)
+
+        cache_path = _vs_cache_path()
+        corpus = _load_cached_corpus(cache_path)
+        if corpus is None:
+            corpus = _build_corpus(embeddings)
+            _save_cached_corpus(cache_path, *corpus)
+
+        texts = corpus[0]
+        if len(texts) > PREFILTER_K:
+            from rank_bm25 import BM25Okapi
+            _bm25 = BM25Okapi([_tokenize(text) for text in texts])
+        _vectorstore = NumpyVectorStore(embeddings, *corpus)
+
     return _vectorstore
 
-def _get_pruning_llm():
-    """Lazy initialization of pruning LLM using Google Gemini."""
-    global _pruning_llm
-    if _pruning_llm is None:
-        from langchain_google_genai import ChatGoogleGenerativeAI
-        _pruning_llm = ChatGoogleGenerativeAI(
-            model="gemini-flash-latest",
-            temperature=0,
-            google_api_key=os.getenv("GEMINI_API_KEY")
-        )
-    return _pruning_llm
+
+def preload_vectorstore() -> None:
+    """
+    Start building the vector store in a background thread.
+
+    Overlaps the download/embedding work with crew startup so the first
+    retrieval finds a warm store (or waits on the build already in progress).
+    """
+    def build():
+        try:
+            _get_vectorstore()
+        except Exception:
+            # The first RAGRetrievalTool call retries and reports the error
+            pass
+
+    threading.Thread(target=build, name="vectorstore-preload", daemon=True).start()
+
+
+@lru_cache(maxsize=1024)
+def _embed_query(query: str) -> tuple:
+    """Embed a query once per process; agents often repeat the same query across retries."""
+    return tuple(_get_vectorstore().embedding.embed_query(query))
+
+
+def _retrieve(query: str, k: int = 4):
+    """
+    Retrieve the k most similar chunks for a query.
+
+    BM25 first narrows the corpus to PREFILTER_K lexical candidates, and only
+    those are scored against the query embedding. If fewer than k chunks share
+    a term with the query (or the corpus is smaller than the prefilter), every
+    chunk is scored so lexical sparsity never caps the number of results.
+    """
+    import numpy as np
+
+    vectorstore = _get_vectorstore()
+    embedding = _embed_query(query)
+
+    candidates = None
+    if _bm25 is not None:
+        scores = _bm25.get_scores(_tokenize(query))
+        top = np.argpartition(-scores, PREFILTER_K)[:PREFILTER_K]
+        top = top[scores[top] > 0]
+        if len(top) >= k:
+            candidates = top
+
+    return vectorstore.similarity_search_by_vector(embedding, k=k, candidates=candidates)
+
+def _get_prune_cache():
+    """Lazy initialization of the on-disk pruning result cache."""
+    global _prune_cache
+    if _prune_cache is None:
+        from diskcache import Cache
+        _prune_cache = Cache(str(PRUNE_CACHE_DIR))
+    return _prune_cache
+
+
+def _prune_cache_key(user_request: str, retrieved_content: str) -> str:
+    """Key covering everything that shapes the pruned output: version, model, prompt and inputs."""
+    prompt_digest = hashlib.sha256(PRUNING_SYSTEM_PROMPT.encode("utf-8")).hexdigest()
+    key = "\0".join(
+        [str(_PRUNE_CACHE_VERSION), PRUNING_MODEL, prompt_digest, user_request, retrieved_content]
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+PRUNING_SYSTEM_PROMPT = """You are an expert at extracting relevant information from documents.
+
+Your task: Analyze the provided document and extract ONLY the information that directly answers or supports the user's specific request. Remove all irrelevant content.
+
+The user's request and the document are given in the user message.
+
+Instructions for pruning:
+1. Keep information that directly addresses the user's question
+2. Preserve key facts, data, and examples that support the answer
+3. Remove tangential discussions, unrelated topics, and excessive background
+4. Maintain the logical flow and context of relevant information
+5. If multiple subtopics are discussed, focus only on those relevant to the request
+6. Preserve important quotes, statistics, and research findings when relevant
+
+Return the pruned content in a clear, concise format that maintains readability while focusing solely on what's needed to answer the user's request."""
 
 
 class RAGRetrievalInput(BaseModel):
@@ -76,9 +362,7 @@ class RAGRetrievalTool(BaseTool):
     def _run(self, query: str) -> str:
         """Retrieve relevant documents from the vector store."""
         try:
-            vectorstore = _get_vectorstore()
-            retriever = vectorstore.as_retriever(search_kwargs={"k": 4})
-            docs = retriever.invoke(query)
+            docs = _retrieve(query, k=4)
             
             # Concatenate retrieved documents
             combined_content = "\n\n---\n\n".join([
@@ -106,35 +390,52 @@ class ContextPruningTool(BaseTool):
         "reduce token usage and improve response quality."
     )
     args_schema: Type[BaseModel] = ContextPruningInput
+    # Optional side channel for a front end that shows pruned output live, e.g. a
+    # CLI wrapper passing ContextPruningTool(stream_callback=print_chunk) to the
+    # pruner agent; the crew itself leaves it unset.
+    # Contract: the chunks of one call always concatenate to the returned string.
+    # A cache hit arrives as a single chunk; on error the fallback text (error
+    # message plus original content) is sent as a final chunk after any partial output.
+    stream_callback: Optional[Callable[[str], None]] = None
 
     def _run(self, user_request: str, retrieved_content: str) -> str:
         """Prune the retrieved content to focus on relevant information."""
+        parts = []
         try:
-            pruning_llm = _get_pruning_llm()
-            
-            pruning_prompt = f"""You are an expert at extracting relevant information from documents.
-
-Your task: Analyze the provided document and extract ONLY the information that directly answers or supports the user's specific request. Remove all irrelevant content.
+            if PRUNE_CACHE_ENABLED:
+                cache = _get_prune_cache()
+                cache_key = _prune_cache_key(user_request, retrieved_content)
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    if self.stream_callback is not None:
+                        self.stream_callback(cached)
+                    return cached
 
-User's Request: {user_request}
-
-Instructions for pruning:
-1. Keep information that directly addresses the user's question
-2. Preserve key facts, data, and examples that support the answer
-3. Remove tangential discussions, unrelated topics, and excessive background
-4. Maintain the logical flow and context of relevant information
-5. If multiple subtopics are discussed, focus only on those relevant to the request
-6. Preserve important quotes, statistics, and research findings when relevant
-
-Return the pruned content in a clear, concise format that maintains readability while focusing solely on what's needed to answer the user's request."""
+            pruning_llm = get_chat_model(PRUNING_MODEL)
             
+            # Static instructions first, per-call data last: the system message is
+            # byte-identical across calls so the provider can cache that prefix
             messages = [
-                {"role": "system", "content": pruning_prompt},
-                {"role": "user", "content": retrieved_content}
+                {"role": "system", "content": PRUNING_SYSTEM_PROMPT},
+                {"role": "user", "content": f"User's Request: {user_request}\n\nDocument:\n{retrieved_content}"}
             ]
             
-            response = pruning_llm.invoke(messages)
-            return response.content
+            for chunk in pruning_llm.stream(messages):
+                if chunk.content:
+                    parts.append(chunk.content)
+                    if self.stream_callback is not None:
+                        self.stream_callback(chunk.content)
+            pruned_content = "".join(parts)
+
+            if PRUNE_CACHE_ENABLED:
+                cache.set(cache_key, pruned_content, expire=PRUNE_CACHE_TTL)
+            return pruned_content
             
         except Exception as e:
-            return f"Error during context pruning: {str(e)}. Returning original content.\n\n{retrieved_content}"
+            # Keep any partial output so the streamed chunks still add up to the return value
+            fallback = ("\n\n" if parts else "") + (
+                f"Error during context pruning: {str(e)}. Returning original content.\n\n{retrieved_content}"
+            )
+            if self.stream_callback is not None:
+                self.stream_callback(fallback)
+            return "".join(parts) + fallback
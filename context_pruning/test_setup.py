@@ -40,6 +40,9 @@ def test_imports():
         ("langchain_community", "LangChain Community"),
         ("langchain_core", "LangChain Core"),
         ("langchain_text_splitters", "LangChain Text Splitters"),
+        ("numpy", "NumPy"),
+        ("diskcache", "DiskCache"),
+        ("rank_bm25", "Rank-BM25"),
     ]
     
     all_imported = True
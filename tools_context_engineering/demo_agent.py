@@ -40,19 +40,24 @@ Run:
 from __future__ import annotations
 
 import argparse
-import difflib
-import json
+import heapq
+import operator
 import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Callable, List
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Sequence, Tuple
 
+import orjson
 import requests
 from dotenv import load_dotenv
+from rank_bm25 import BM25Okapi
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from langchain.agents import create_agent
 from langchain.tools import tool
-from langchain_community.tools import DuckDuckGoSearchRun
-from langchain_community.utilities import WikipediaAPIWrapper
-from langchain_community.tools import WikipediaQueryRun
 
 
 # =============================================================================
@@ -64,7 +69,7 @@ from langchain_community.tools import WikipediaQueryRun
 # - When to use optional parameters
 # - Correlations between parameters
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ToolSpec:
     """
     Metadata wrapper for tools that supports:
@@ -73,9 +78,41 @@ class ToolSpec:
     """
     name: str
     description: str
-    tool: Callable  # The actual tool (decorated function or BaseTool instance)
+    tool: Optional[Callable] = None  # The actual tool (decorated function or BaseTool instance)
+    factory: Optional[Callable[[], Any]] = None  # Or: builds the tool on first use (defers heavy imports)
     defer_loading: bool = True  # CONCEPT 1: If True, only load when query matches
-    examples: List[str] = field(default_factory=list)  # CONCEPT 3: Usage examples
+    examples: Tuple[str, ...] = ()  # CONCEPT 3: Usage examples
+    search_target: str = field(init=False, repr=False)  # Lowercased text matched by select_tools
+
+    def __post_init__(self):
+        if (self.tool is None) == (self.factory is None):
+            raise ValueError(f"ToolSpec {self.name!r} needs exactly one of tool or factory")
+        # Frozen: the derived field has to bypass __setattr__
+        object.__setattr__(self, "search_target", f"{self.name} {self.description}".lower())
+
+    def load(self):
+        """Return the tool; factories are only called once a spec is selected (and cache their result)."""
+        return self.tool or self.factory()
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """
+    Tool catalog partitioned once at build time, so select_tools never
+    re-splits it. deferred_targets is aligned index-for-index with deferred.
+    """
+    always: Tuple[ToolSpec, ...]
+    deferred: Tuple[ToolSpec, ...]
+    deferred_targets: Tuple[str, ...]
+
+    @classmethod
+    def from_specs(cls, specs: Sequence[ToolSpec]) -> "Catalog":
+        deferred = tuple(t for t in specs if t.defer_loading)
+        return cls(
+            always=tuple(t for t in specs if not t.defer_loading),
+            deferred=deferred,
+            deferred_targets=tuple(t.search_target for t in deferred),
+        )
 
 
 # =============================================================================
@@ -83,21 +120,46 @@ class ToolSpec:
 # =============================================================================
 # Instead of loading all tools (consuming 50K+ tokens), we:
 # 1. Always load critical tools (defer_loading=False)
-# 2. Use similarity search to find relevant deferred tools
+# 2. Use BM25 keyword search to find relevant deferred tools
 # 3. Only load matched tools into context
 
-def _score(query: str, spec: ToolSpec) -> float:
+# Filler words dropped from queries and tool metadata. With only a handful of
+# deferred tools, BM25's IDF would otherwise rate a word like "and" (present in
+# one description) above a domain term like "weather" (present in two).
+_STOPWORDS = frozenset("""
+    a an and are as at be by can compare do does e eg for from g get give how i
+    in into is it its me my of on or out please s show tell than that the their
+    them then there these this to up use using vs want was what whats when where
+    which who why will with you your
+""".split())
+
+
+def _tokenize(text: str) -> List[str]:
     """
-    Compute similarity between user query and tool metadata.
+    Word tokens of already-lowercased text, minus stopwords.
     
-    In production, you'd use embeddings or BM25 for better matching.
-    This uses SequenceMatcher as a simple baseline.
+    Underscores split so `github_repo_search` matches "github".
     """
-    target = f"{spec.name} {spec.description}".lower()
-    return difflib.SequenceMatcher(None, query.lower(), target).ratio()
+    return [t for t in re.findall(r"[a-z0-9]+", text) if t not in _STOPWORDS]
+
+
+@lru_cache(maxsize=8)
+def _bm25_index(targets: Tuple[str, ...]) -> BM25Okapi:
+    """BM25 index over tool metadata, built once per distinct set of deferred tools."""
+    return BM25Okapi([_tokenize(target) for target in targets])
 
 
-def select_tools(query: str, catalog: List[ToolSpec], top_k: int = 3) -> List[ToolSpec]:
+def _score_all(query: str, targets: Tuple[str, ...]) -> List[float]:
+    """
+    Score every tool's name + description against the query in one BM25 pass.
+    
+    Unlike character-level matching, BM25 rewards shared keywords and weights
+    rare ones (e.g. "weather", "github") above common filler words.
+    """
+    return _bm25_index(targets).get_scores(_tokenize(query.lower())).tolist()
+
+
+def select_tools(query: str, catalog: Catalog, top_k: int = 3) -> List[ToolSpec]:
     """
     CONCEPT 1: Tool Search Tool Implementation
     
@@ -107,10 +169,13 @@ def select_tools(query: str, catalog: List[ToolSpec], top_k: int = 3) -> List[To
     
     Anthropic's stats: This reduces context from ~77K to ~8.7K tokens (85% savings)
     """
-    always = [t for t in catalog if not t.defer_loading]
-    deferred = [t for t in catalog if t.defer_loading]
-    scored = sorted(deferred, key=lambda spec: _score(query, spec), reverse=True)
-    chosen = scored[:top_k]
+    always = list(catalog.always)
+    if not catalog.deferred:
+        return always
+    # Score each tool once; -i keeps catalog order on ties and stops ToolSpec comparisons
+    scores = _score_all(query, catalog.deferred_targets)
+    scored_pairs = [(scores[i], -i, spec) for i, spec in enumerate(catalog.deferred)]
+    chosen = [spec for _, _, spec in heapq.nlargest(top_k, scored_pairs)]
     return always + chosen
 
 
@@ -120,21 +185,20 @@ def select_tools(query: str, catalog: List[ToolSpec], top_k: int = 3) -> List[To
 # Each tool uses the @tool decorator (LangChain v1 pattern)
 # Examples show correct invocation patterns (Concept 3)
 
-@tool
-def get_weather(city: str) -> str:
-    """
-    Get tomorrow's weather summary for a city via Open-Meteo APIs.
-    
-    Args:
-        city: City name (e.g., "San Francisco", "Tokyo", "London")
-    
-    Returns:
-        Weather summary with avg/max temperature and precipitation probability
-        
-    Example:
-        get_weather("San Francisco") -> "Weather for San Francisco: avg temp 15.2C, high 19.8C, max precip prob 10%"
-    """
-    geo_resp = requests.get(
+# One pooled session for every HTTP tool: repeated calls to the same host
+# (e.g. Open-Meteo geocoding + forecast) reuse the TLS connection.
+_SESSION = requests.Session()
+_SESSION.headers.update({"Accept-Encoding": "gzip, deflate"})
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=Retry(total=2, backoff_factor=0.1)),
+)
+WEATHER_MAX_WORKERS = 8  # Concurrent cities in get_weather_batch
+HTTP_GET_MAX_CHARS = 5000  # Text returned by http_get
+
+def _weather_summary(city: str) -> str:
+    """Geocode a city and summarize its 1-day Open-Meteo forecast (shared by the weather tools)."""
+    geo_resp = _SESSION.get(
         "https://geocoding-api.open-meteo.com/v1/search",
         params={"name": city, "count": 1, "language": "en", "format": "json"},
         timeout=10,
@@ -146,7 +210,7 @@ def get_weather(city: str) -> str:
 
     first = geo["results"][0]
     lat, lon = first["latitude"], first["longitude"]
-    forecast = requests.get(
+    forecast = _SESSION.get(
         "https://api.open-meteo.com/v1/forecast",
         params={
             "latitude": lat,
@@ -158,20 +222,91 @@ def get_weather(city: str) -> str:
         timeout=10,
     )
     forecast.raise_for_status()
-    data = forecast.json()
-    temps = data.get("hourly", {}).get("temperature_2m", [])
-    precip = data.get("hourly", {}).get("precipitation_probability", [])
+    hourly = forecast.json().get("hourly", {})
+    temps = hourly.get("temperature_2m", [])
+    precip = hourly.get("precipitation_probability", [])
     if not temps:
         return f"Could not fetch forecast for {city}."
 
-    avg_temp = round(sum(temps) / len(temps), 1)
-    max_temp = round(max(temps), 1)
+    # Single pass over the hourly temperatures for both sum and max
+    t_sum, t_max = 0.0, float("-inf")
+    for t in temps:
+        t_sum += t
+        if t > t_max:
+            t_max = t
+    avg_temp = round(t_sum / len(temps), 1)
+    max_temp = round(t_max, 1)
     max_precip = max(precip) if precip else 0
     return (
         f"Weather for {city}: avg temp {avg_temp}C, high {max_temp}C, max precip prob {max_precip}%"
     )
 
 
+def _batch_weather(cities: List[str]) -> List[str]:
+    """
+    Fetch several cities concurrently.
+    
+    Each city still needs geocoding before its forecast, but cities are
+    independent, so N cities take roughly one city's latency instead of N.
+    """
+    def one(city: str) -> str:
+        try:
+            return _weather_summary(city)
+        except requests.RequestException as e:
+            return f"Could not fetch weather for {city}: {e}"
+
+    with ThreadPoolExecutor(max_workers=WEATHER_MAX_WORKERS) as pool:
+        return list(pool.map(one, cities))
+
+
+@tool
+def get_weather(city: str) -> str:
+    """
+    Get tomorrow's weather summary for a city via Open-Meteo APIs.
+    
+    Args:
+        city: City name (e.g., "San Francisco", "Tokyo", "London")
+    
+    Returns:
+        Weather summary with avg/max temperature and precipitation probability
+        
+    Example:
+        get_weather("San Francisco") -> "Weather for San Francisco: avg temp 15.2C, high 19.8C, max precip prob 10%"
+    """
+    return _weather_summary(city)
+
+
+@tool
+def get_weather_batch(cities: List[str]) -> str:
+    """
+    Get tomorrow's weather summaries for several cities in one call (fetched in parallel).
+    
+    Args:
+        cities: City names (e.g., ["Tokyo", "London", "Paris"])
+    
+    Returns:
+        One weather summary line per city, in the order given
+        
+    Example:
+        get_weather_batch(["Tokyo", "London"]) -> "Weather for Tokyo: ...\nWeather for London: ..."
+    """
+    return "\n".join(_batch_weather(cities))
+
+
+_GITHUB_FIELD_NAMES = ("full_name", "stargazers_count", "html_url", "description")
+_GITHUB_FIELDS = operator.itemgetter(*_GITHUB_FIELD_NAMES)
+_GITHUB_SUMMARY_KEYS = ("name", "stars", "url", "description")
+
+
+def _github_summary(repo: dict) -> dict:
+    """Pick the summary fields from a search item; missing fields become None, as with dict.get."""
+    try:
+        values = _GITHUB_FIELDS(repo)
+    except KeyError:
+        values = [repo.get(name) for name in _GITHUB_FIELD_NAMES]
+    return dict(zip(_GITHUB_SUMMARY_KEYS, values))
+
+
 @tool
 def search_github_repos(topic: str) -> str:
     """
@@ -186,7 +321,7 @@ def search_github_repos(topic: str) -> str:
     Example:
         search_github_repos("langchain") -> '[{"name": "langchain-ai/langchain", "stars": 95000, ...}]'
     """
-    resp = requests.get(
+    resp = _SESSION.get(
         "https://api.github.com/search/repositories",
         params={"q": topic, "sort": "stars", "order": "desc", "per_page": 5},
         headers={"Accept": "application/vnd.github+json"},
@@ -198,16 +333,11 @@ def search_github_repos(topic: str) -> str:
     if not repos:
         return f"No repositories found for '{topic}'."
 
-    summary = [
-        {
-            "name": repo.get("full_name"),
-            "stars": repo.get("stargazers_count"),
-            "url": repo.get("html_url"),
-            "description": repo.get("description"),
-        }
-        for repo in repos
-    ]
-    return json.dumps(summary, indent=2)
+    summary = [_github_summary(repo) for repo in repos]
+    return orjson.dumps(summary, option=orjson.OPT_INDENT_2).decode()
+
+
+_FX_SPLIT = re.compile(r"\s+|/|\bto\b")  # "USD to EUR", "USD/JPY", "GBP JPY"
 
 
 @tool
@@ -224,11 +354,11 @@ def fx_rate(pair: str) -> str:
     Example:
         fx_rate("USD to EUR") -> "1 USD = 0.9234 EUR"
     """
-    parts = pair.replace(" to ", " ").replace("/", " ").split()
+    parts = [p for p in _FX_SPLIT.split(pair) if p]
     if len(parts) < 2:
         return "Please provide a pair like 'USD to EUR'."
     base, quote = parts[0].upper(), parts[1].upper()
-    resp = requests.get(
+    resp = _SESSION.get(
         "https://api.exchangerate.host/convert",
         params={"from": base, "to": quote, "amount": 1},
         timeout=10,
@@ -255,9 +385,17 @@ def http_get(url: str) -> str:
     Example:
         http_get("https://api.github.com/rate_limit") -> '{"resources": ...}'
     """
-    resp = requests.get(url, timeout=10)
-    resp.raise_for_status()
-    return resp.text[:5000]
+    # Stream and stop once enough text is decoded, so multi-MB pages are never fully downloaded
+    with _SESSION.get(url, stream=True, timeout=10) as resp:
+        resp.raise_for_status()
+        resp.encoding = resp.encoding or "utf-8"  # decode_unicode needs a known encoding
+        chunks, size = [], 0
+        for chunk in resp.iter_content(chunk_size=1024, decode_unicode=True):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= HTTP_GET_MAX_CHARS:
+                break
+    return "".join(chunks)[:HTTP_GET_MAX_CHARS]
 
 
 # =============================================================================
@@ -272,6 +410,18 @@ def http_get(url: str) -> str:
 #   - Without PTC: 20 tool calls, 2000+ expense items in context
 #   - With PTC: One code block, only 3 exceeding names returned
 
+# Persistent namespace: imports and helpers defined by one snippet stay
+# available to the next, like a REPL session.
+_PTC_GLOBALS = {"__builtins__": __builtins__}
+_PTC_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=256)
+def _compile(src: str):
+    """Compile a snippet once; agents often re-run the same code."""
+    return compile(src, "<agent_ptc>", "exec")
+
+
 @tool
 def run_python(code: str) -> str:
     """
@@ -302,15 +452,31 @@ def run_python(code: str) -> str:
     
     output = io.StringIO()
     try:
-        with contextlib.redirect_stdout(output):
-            exec(code, {"__builtins__": __builtins__})
+        # The lock also keeps concurrent calls from sharing redirected stdout
+        with _PTC_LOCK, contextlib.redirect_stdout(output):
+            exec(_compile(code), _PTC_GLOBALS)
         result = output.getvalue()
         return result if result else "Code executed successfully (no output)"
     except Exception as e:
         return f"Error: {str(e)}"
 
 
-def build_catalog() -> List[ToolSpec]:
+# langchain_community tools pull in bs4, wikipedia, duckduckgo_search, etc.;
+# they are imported only when a spec using them is actually loaded.
+@lru_cache(maxsize=1)
+def _duckduckgo_tool():
+    from langchain_community.tools import DuckDuckGoSearchRun
+    return DuckDuckGoSearchRun()
+
+
+@lru_cache(maxsize=1)
+def _wikipedia_tool():
+    from langchain_community.tools import WikipediaQueryRun
+    from langchain_community.utilities import WikipediaAPIWrapper
+    return WikipediaQueryRun(api_wrapper=WikipediaAPIWrapper())
+
+
+def build_catalog() -> Catalog:
     """
     Build the catalog of available tools with Anthropic's patterns:
     
@@ -323,29 +489,26 @@ def build_catalog() -> List[ToolSpec]:
     # These are your most-used tools, always available without search
     # =========================================================================
     
-    duck_tool = DuckDuckGoSearchRun()
     duck = ToolSpec(
         name="duckduckgo_search",
         description="Web search for fresh results using DuckDuckGo (returns snippets).",
-        tool=duck_tool,
+        factory=_duckduckgo_tool,
         defer_loading=False,  # Always loaded - essential for general queries
-        examples=[
+        examples=(
             "duckduckgo_search('latest news about vector databases')",
-            "duckduckgo_search('LangChain vs LlamaIndex comparison 2024')"
-        ]
+            "duckduckgo_search('LangChain vs LlamaIndex comparison 2024')",
+        )
     )
 
-    wiki_api = WikipediaAPIWrapper()
-    wiki_tool = WikipediaQueryRun(api_wrapper=wiki_api)
     wiki = ToolSpec(
         name="wikipedia",
         description="Wikipedia lookup for concise encyclopedic summaries.",
-        tool=wiki_tool,
+        factory=_wikipedia_tool,
         defer_loading=False,  # Always loaded - essential for factual lookups
-        examples=[
+        examples=(
             "wikipedia('Transformer neural network architecture')",
-            "wikipedia('Retrieval augmented generation')"
-        ]
+            "wikipedia('Retrieval augmented generation')",
+        )
     )
 
     # =========================================================================
@@ -358,10 +521,10 @@ def build_catalog() -> List[ToolSpec]:
         description="Generic HTTP GET for JSON/text APIs.",
         tool=http_get,
         defer_loading=True,
-        examples=[
+        examples=(
             "http_get('https://api.github.com/rate_limit')",
-            "http_get('https://jsonplaceholder.typicode.com/todos/1')"
-        ]
+            "http_get('https://jsonplaceholder.typicode.com/todos/1')",
+        )
     )
 
     # CONCEPT 2: Programmatic Tool Calling tool
@@ -370,10 +533,10 @@ def build_catalog() -> List[ToolSpec]:
         description="Run Python code for data processing, loops, aggregations, and orchestration. Use when you need to transform data or keep intermediate results out of context.",
         tool=run_python,
         defer_loading=True,
-        examples=[
+        examples=(
             "run_python('numbers = [1,2,3,4,5]\\nprint(sum(numbers))')",
-            "run_python('import json\\ndata = {\"a\": 1}\\nprint(json.dumps(data))')"
-        ]
+            "run_python('import json\\ndata = {\"a\": 1}\\nprint(json.dumps(data))')",
+        )
     )
 
     weather = ToolSpec(
@@ -381,11 +544,22 @@ def build_catalog() -> List[ToolSpec]:
         description="Get a 1-day forecast using Open-Meteo geocoding + forecast APIs by city name.",
         tool=get_weather,
         defer_loading=True,
-        examples=[
+        examples=(
             "get_weather('San Francisco')",
             "get_weather('Tokyo')",
-            "get_weather('London')"
-        ]
+            "get_weather('London')",
+        )
+    )
+
+    weather_batch = ToolSpec(
+        name="open_meteo_weather_batch",
+        description="Get 1-day forecasts for multiple cities at once using Open-Meteo (parallel requests).",
+        tool=get_weather_batch,
+        defer_loading=True,
+        examples=(
+            "get_weather_batch(['Tokyo', 'London', 'Paris'])",
+            "get_weather_batch(['San Francisco', 'New York'])",
+        )
     )
 
     github_search = ToolSpec(
@@ -393,10 +567,10 @@ def build_catalog() -> List[ToolSpec]:
         description="Search GitHub repositories by topic keyword, sorted by stars.",
         tool=search_github_repos,
         defer_loading=True,
-        examples=[
+        examples=(
             "search_github_repos('retrieval augmented generation')",
-            "search_github_repos('LLM agent framework')"
-        ]
+            "search_github_repos('LLM agent framework')",
+        )
     )
 
     fx = ToolSpec(
@@ -404,13 +578,19 @@ def build_catalog() -> List[ToolSpec]:
         description="Fetch FX conversion rate (e.g., USD to EUR).",
         tool=fx_rate,
         defer_loading=True,
-        examples=[
+        examples=(
             "fx_rate('USD to EUR')",
-            "fx_rate('GBP/JPY')"
-        ]
+            "fx_rate('GBP/JPY')",
+        )
     )
 
-    return [duck, wiki, http_get_spec, python_repl, weather, github_search, fx]
+    return Catalog.from_specs([duck, wiki, http_get_spec, python_repl, weather, weather_batch, github_search, fx])
+
+
+@lru_cache(maxsize=1)
+def _catalog() -> Catalog:
+    """Process-wide catalog: tool clients are constructed once, not per agent build."""
+    return build_catalog()
 
 
 def build_agent(query: str, top_k: int, model_name: str, temperature: float):
@@ -422,11 +602,11 @@ def build_agent(query: str, top_k: int, model_name: str, temperature: float):
     2. Running select_tools() to find relevant tools for this query
     3. Only loading matched tools into the agent
     """
-    catalog = build_catalog()
+    catalog = _catalog()
     
     # CONCEPT 1: Select only relevant tools based on query
     chosen_specs = select_tools(query, catalog, top_k)
-    tools = [spec.tool for spec in chosen_specs]
+    tools = [spec.load() for spec in chosen_specs]
 
     # Create agent using LangChain v1 API
     agent = create_agent(